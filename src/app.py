@@ -3,27 +3,24 @@ Autonomous Insurance Claims Processing Agent — Dynamic Dashboard.
 Dark theme, pipeline visualization, KPI cards, session state, and full dashboard layout.
 """
 
-import json
+import hashlib
 import os
 import sys
+from html import escape as _esc
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Final, Optional, TYPE_CHECKING
 
 _project_root = Path(__file__).resolve().parent.parent
 if str(_project_root) not in sys.path:
     sys.path.insert(0, str(_project_root))
 
+import orjson
 import streamlit as st
 
-from src.extractor import extract_fnol_from_file
-from src.output_format import (
-    build_standard_output,
-    get_field_value_for_form,
-    get_missing_fields,
-    CLAIM_FIELD_SPEC,
-)
-from src.router import route_fnol
-from src.schema import FNOLDocument
+# Pipeline modules (OpenAI SDK, PyMuPDF, pydantic model build) are imported
+# lazily at point of use so cold start paints the dashboard shell first.
+if TYPE_CHECKING:
+    from src.schema import FNOLDocument
 
 
 # --- Session state keys ---
@@ -33,175 +30,73 @@ SK_FNOL_DOC = "dashboard_fnol_doc"
 SK_DECISION = "dashboard_decision"
 SK_ERROR = "dashboard_error"
 SK_TRIGGER_SAMPLE = "dashboard_trigger_sample"
+SK_RENDER_SIG = "dashboard_render_sig"
+SK_RENDERED_HTML = "dashboard_rendered_html"
 
 
 # --- Dashboard CSS ---
-DASHBOARD_CSS = """
-<style>
-/* Base dark theme */
-[data-testid="stAppViewContainer"] {
-    background: linear-gradient(160deg, #0f172a 0%, #1e1b4b 45%, #0f172a 100%);
-    background-attachment: fixed;
-}
-[data-testid="stHeader"] { background: rgba(15, 23, 42, 0.92); }
-[data-testid="stSidebar"] {
-    background: linear-gradient(180deg, #1e293b 0%, #0f172a 100%);
-    border-right: 1px solid #334155;
-}
-[data-testid="stSidebar"] .stMarkdown { color: #cbd5e1; }
-
-/* Dashboard header strip */
-.dash-header {
-    display: flex;
-    align-items: center;
-    justify-content: space-between;
-    flex-wrap: wrap;
-    gap: 1rem;
-    padding: 0.75rem 0 1.25rem 0;
-    border-bottom: 1px solid #334155;
-    margin-bottom: 1.5rem;
-}
-.dash-title-block h1 { font-size: 1.6rem; font-weight: 700; color: #f8fafc; margin: 0; letter-spacing: -0.02em; }
-.dash-title-block p { color: #94a3b8; font-size: 0.9rem; margin: 0.35rem 0 0 0; }
-.dash-stats {
-    display: flex;
-    gap: 1rem;
-    align-items: center;
-    flex-wrap: wrap;
-}
-.dash-stat {
-    background: rgba(30, 41, 59, 0.8);
-    border: 1px solid #334155;
-    border-radius: 10px;
-    padding: 0.5rem 1rem;
-    font-size: 0.85rem;
-    color: #cbd5e1;
-}
-.dash-stat strong { color: #f8fafc; margin-right: 0.35rem; }
-
-/* Pipeline steps */
-.pipeline-wrap {
-    display: flex;
-    align-items: center;
-    justify-content: space-between;
-    max-width: 480px;
-    margin: 1rem 0 1.5rem 0;
-    padding: 0.75rem 1rem;
-    background: rgba(15, 23, 42, 0.6);
-    border: 1px solid #334155;
-    border-radius: 12px;
-}
-.pipeline-step {
-    display: flex;
-    align-items: center;
-    gap: 0.5rem;
-    font-size: 0.85rem;
-    color: #64748b;
-}
-.pipeline-step.done { color: #22c55e; }
-.pipeline-step.done .step-num { background: #22c55e; color: #0f172a; }
-.pipeline-step.active { color: #0ea5e9; }
-.pipeline-step.active .step-num { background: #0ea5e9; color: #fff; }
-.step-num {
-    width: 26px;
-    height: 26px;
-    border-radius: 50%;
-    background: #334155;
-    color: #94a3b8;
-    display: inline-flex;
-    align-items: center;
-    justify-content: center;
-    font-weight: 700;
-    font-size: 0.75rem;
-}
-.pipeline-conn { flex: 1; height: 2px; background: #334155; margin: 0 0.25rem; max-width: 40px; }
-.pipeline-conn.done { background: #22c55e; }
-
-/* KPI / summary cards row */
-.kpi-row { display: flex; gap: 0.75rem; flex-wrap: wrap; margin: 1rem 0; }
-.kpi-card {
-    flex: 1;
-    min-width: 140px;
-    background: linear-gradient(145deg, #1e293b 0%, #0f172a 100%);
-    border: 1px solid #334155;
-    border-radius: 10px;
-    padding: 0.9rem 1rem;
-    box-shadow: 0 2px 12px rgba(0,0,0,0.2);
-}
-.kpi-card .label { font-size: 0.7rem; text-transform: uppercase; letter-spacing: 0.06em; color: #64748b; margin-bottom: 0.35rem; }
-.kpi-card .val { font-size: 1rem; font-weight: 600; color: #f1f5f9; word-break: break-word; }
-.kpi-card .val.muted { color: #94a3b8; font-weight: 500; }
-
-/* Decision cards */
-.styled-card {
-    background: linear-gradient(145deg, #1e293b 0%, #0f172a 100%);
-    border: 1px solid #334155;
-    border-radius: 12px;
-    padding: 1.25rem 1.5rem;
-    margin: 0.75rem 0;
-    box-shadow: 0 4px 20px rgba(0,0,0,0.3);
-}
-.styled-card h4 { color: #94a3b8; font-size: 0.75rem; text-transform: uppercase; letter-spacing: 0.08em; margin: 0 0 0.5rem 0; }
-.styled-card .value { font-size: 1.35rem; font-weight: 700; color: #f8fafc; }
-.route-fast_track   { color: #22c55e !important; border-left: 4px solid #22c55e; }
-.route-manual_review { color: #f59e0b !important; border-left: 4px solid #f59e0b; }
-.route-investigation { color: #ef4444 !important; border-left: 4px solid #ef4444; }
-.route-specialist    { color: #0ea5e9 !important; border-left: 4px solid #0ea5e9; }
-.route-standard     { color: #94a3b8 !important; border-left: 4px solid #64748b; }
-.badge-ready { background: #14532d; color: #86efac; padding: 0.25rem 0.6rem; border-radius: 9999px; font-size: 0.8rem; font-weight: 600; }
-.badge-review { background: #78350f; color: #fcd34d; padding: 0.25rem 0.6rem; border-radius: 9999px; font-size: 0.8rem; font-weight: 600; }
-
-.reasoning-list {
-    background: #0f172a; border: 1px solid #334155; border-radius: 10px;
-    padding: 1rem 1.25rem; margin: 0.75rem 0;
-}
-.reasoning-list li { color: #cbd5e1; margin: 0.4rem 0; line-height: 1.5; }
-
-.upload-zone {
-    border: 2px dashed #475569; border-radius: 12px; padding: 1.25rem;
-    background: rgba(30, 41, 59, 0.4); margin-bottom: 1.25rem;
-}
-.section-title { font-size: 0.8rem; text-transform: uppercase; letter-spacing: 0.08em; color: #94a3b8; margin: 1rem 0 0.5rem 0; }
-
-.stTabs [data-baseweb="tab-list"] { background: #1e293b; border-radius: 10px; padding: 4px; gap: 4px; }
-.stTabs [data-baseweb="tab"] { color: #94a3b8; border-radius: 8px; }
-.stTabs [aria-selected="true"] { background: #334155 !important; color: #f8fafc !important; }
-
-.stButton > button {
-    background: linear-gradient(135deg, #0ea5e9 0%, #0369a1 100%) !important;
-    color: #fff !important; border: none !important; border-radius: 8px !important;
-    font-weight: 600 !important; padding: 0.5rem 1.25rem !important;
-}
-.stButton > button:hover {
-    background: linear-gradient(135deg, #38bdf8 0%, #0ea5e9 100%) !important;
-    box-shadow: 0 4px 14px rgba(14, 165, 233, 0.4) !important;
-}
-[data-testid="stSidebar"] input { background: #0f172a !important; border: 1px solid #334155 !important; color: #f1f5f9 !important; }
-[data-testid="stSidebar"] label { color: #cbd5e1 !important; }
-
-.dash-section { margin-top: 1.5rem; }
-
-/* Claim form */
-.form-section {
-    background: linear-gradient(145deg, #1e293b 0%, #0f172a 100%);
-    border: 1px solid #334155;
-    border-radius: 12px;
-    padding: 1rem 1.25rem;
-    margin: 0.75rem 0;
-    box-shadow: 0 2px 12px rgba(0,0,0,0.2);
-}
-.form-section h5 { color: #0ea5e9; font-size: 0.85rem; margin: 0 0 0.75rem 0; text-transform: uppercase; letter-spacing: 0.06em; }
-.form-row { display: flex; gap: 1rem; margin: 0.4rem 0; align-items: flex-start; }
-.form-label { min-width: 160px; font-size: 0.8rem; color: #94a3b8; }
-.form-value { flex: 1; font-size: 0.9rem; color: #f1f5f9; }
-.form-value.missing { color: #64748b; font-style: italic; }
-.missing-badge { background: #7f1d1d; color: #fecaca; padding: 0.2rem 0.5rem; border-radius: 6px; font-size: 0.75rem; margin: 0.25rem 0.25rem 0.25rem 0; display: inline-block; }
-</style>
-"""
-
+_CSS_PATH = Path(__file__).resolve().parent / "dashboard.css"
+
+
+@st.cache_resource(show_spinner=False)
+def _load_css() -> str:
+    """Read the dashboard stylesheet once per process and wrap it for st.markdown."""
+    return f"<style>\n{_CSS_PATH.read_text(encoding='utf-8')}</style>"
+
+
+class _PipelineError(Exception):
+    """Pipeline failure carrying any text extracted before the error.
+
+    Raised (rather than returned) from _run_pipeline so st.cache_data never
+    stores a failed run — otherwise a run without an API key would pin that
+    file hash to its error for the rest of the process, ignoring a key
+    entered later.
+    """
+
+    def __init__(self, raw_text: str, message: str):
+        super().__init__(message)
+        self.raw_text = raw_text
+
+
+@st.cache_data(show_spinner=False)
+def _run_pipeline(file_hash: str, _source, filename: str, use_llm: bool, model: str, _api_key: Optional[str]):
+    """
+    Run the full pipeline (extract -> validate -> route) once per unique document.
+    Cached on (file_hash, filename, use_llm, model): re-uploading the same file
+    skips the LLM round-trip. ``_source`` (path or in-memory bytes) and
+    ``_api_key`` carry a leading underscore so Streamlit neither hashes the
+    document twice nor caches the secret as a key. Failures raise
+    _PipelineError so only successful results are cached.
+    """
+    from src.extractor import extract_fnol_from_file
+    from src.router import route_fnol
+
+    raw_text, fnol_doc, err_msg = extract_fnol_from_file(
+        _source,
+        filename=filename,
+        use_llm=use_llm,
+        model=model,
+        api_key=_api_key,
+    )
+    if err_msg:
+        raise _PipelineError(raw_text, err_msg)
+    decision = route_fnol(fnol_doc) if fnol_doc else None
+    return raw_text, fnol_doc, None, decision
+
+
+# hash_funcs use qualified-name keys so the pipeline modules stay lazily imported.
+@st.cache_data(
+    show_spinner=False,
+    hash_funcs={
+        "src.schema.FNOLDocument": lambda d: d.model_dump_json(),
+        "src.router.RoutingDecision": repr,
+    },
+)
+def _standard_output(doc, decision) -> dict:
+    """Cached build_standard_output: reruns after the first are a dict lookup."""
+    from src.output_format import build_standard_output
 
-def _inject_css():
-    st.markdown(DASHBOARD_CSS, unsafe_allow_html=True)
+    return build_standard_output(doc, decision)
 
 
 def _route_display_class(route: str) -> str:
@@ -212,57 +107,163 @@ def _decision_ready_badge(ready: bool) -> tuple[str, str]:
     return ("Decision ready", "badge-ready") if ready else ("Manual review required", "badge-review")
 
 
-def _get_holder_name(doc: Optional[FNOLDocument]) -> str:
-    if not doc or not doc.parties or not doc.parties.claimant:
-        return doc.policy.holder_name if doc and doc.policy and doc.policy.holder_name else "—"
-    return doc.parties.claimant.name or (doc.policy.holder_name if doc.policy else "") or "—"
+def _get_holder_name(d: dict) -> str:
+    """Claimant name, falling back to policy holder, from a model_dump() dict."""
+    claimant = ((d.get("parties") or {}).get("claimant") or {}).get("name")
+    holder = (d.get("policy") or {}).get("holder_name")
+    return claimant or holder or "—"
+
 
+def _get_estimated_damage(d: dict) -> Optional[float]:
+    """Estimated damage from asset, falling back to the initial estimate."""
+    damage = (d.get("asset") or {}).get("estimated_damage")
+    if damage is None:
+        damage = (d.get("status") or {}).get("initial_estimate")
+    return float(damage) if damage is not None else None
 
-def _get_estimated_damage(doc: Optional[FNOLDocument]) -> Optional[float]:
-    if not doc:
-        return None
-    if doc.asset and doc.asset.estimated_damage is not None:
-        return float(doc.asset.estimated_damage)
-    if doc.status and doc.status.initial_estimate is not None:
-        return float(doc.status.initial_estimate)
-    return None
+
+# Precompiled HTML templates: filled with a small token dict per rerun instead of
+# re-parsing f-string concatenations in bytecode.
+_PIPELINE_TPL = (
+    '<div class="pipeline-wrap">'
+    '<span class="pipeline-step {step1}"><span class="step-num">1</span> Extract</span>'
+    '<span class="pipeline-conn {c1}"></span>'
+    '<span class="pipeline-step {step2}"><span class="step-num">2</span> Validate</span>'
+    '<span class="pipeline-conn {c2}"></span>'
+    '<span class="pipeline-step {step3}"><span class="step-num">3</span> Route</span>'
+    '</div>'
+)
+
+_HEADER_TPL = (
+    '<div class="dash-header">'
+    '<div class="dash-title-block">'
+    '<h1>📋 Autonomous Insurance Claims Processing Agent</h1>'
+    '<p>First Notice of Loss (FNOL) — Extract, Validate, Route</p>'
+    '</div>'
+    '<div class="dash-stats">{stats}</div>'
+    '</div>'
+)
+_STAT_TPL = '<span class="dash-stat"><strong>{label}</strong> {value}</span>'
+_HEADER_EMPTY_STATS = '<span class="dash-stat">Upload a file to start</span>'
+
+_KPI_TPL = (
+    '<div class="kpi-row">'
+    '<div class="kpi-card"><div class="label">Policy #</div><div class="val">{policy_num}</div></div>'
+    '<div class="kpi-card"><div class="label">Holder / Claimant</div><div class="val muted">{holder}</div></div>'
+    '<div class="kpi-card"><div class="label">Incident date</div><div class="val">{inc_date}</div></div>'
+    '<div class="kpi-card"><div class="label">Est. damage</div><div class="val">{damage}</div></div>'
+    '<div class="kpi-card"><div class="label">Claim type</div><div class="val">{claim_type}</div></div>'
+    '</div>'
+)
+
+# Static sidebar / section strings, interned once at import instead of being
+# rebuilt as literals on every rerun.
+_SIDEBAR_RULES: Final[str] = (
+    "• Damage < $25,000 → **Fast-track**\n"
+    "• Mandatory field missing → **Manual review**\n"
+    "• Words: fraud, inconsistent, staged → **Investigation**\n"
+    "• Claim type = injury → **Specialist queue**"
+)
+_SIDEBAR_HINT: Final[str] = "Upload a PDF or TXT FNOL, or load the sample claim."
+_UPLOAD_TITLE: Final[str] = '<p class="section-title">Upload document</p>'
+_SUMMARY_TITLE: Final[str] = '<p class="section-title">Claim summary</p>'
+_FORM_TITLE: Final[str] = '<p class="section-title">Claim form (all fields)</p>'
+_DECISION_TITLE: Final[str] = '<p class="section-title">Routing decision</p>'
+_EXPORT_TITLE: Final[str] = '<p class="section-title">Data & export</p>'
+
+# Class-token lookup: avoids nested ternaries in the per-rerun path.
+_DONE_CLASS = {True: "done", False: ""}
+
+
+def _step_class(done: bool, active: bool) -> str:
+    return "done" if done else ("active" if active else "")
+
+
+def _build_pipeline_html(has_raw: bool, has_doc: bool, has_decision: bool) -> str:
+    tokens = {
+        "step1": _step_class(has_raw, not has_doc and not has_decision),
+        "step2": _step_class(has_doc, has_raw and not has_doc),
+        "step3": _step_class(has_decision, has_doc and not has_decision),
+        "c1": _DONE_CLASS[has_raw],
+        "c2": _DONE_CLASS[has_doc],
+    }
+    return _PIPELINE_TPL.format_map(tokens)
+
+
+# The pipeline widget has only 2^3 possible states: specialize all of them at
+# import so a rerun is a dict lookup, not string formatting.
+_PIPELINE_HTML = {
+    (r, d, dec): _build_pipeline_html(r, d, dec)
+    for r in (False, True)
+    for d in (False, True)
+    for dec in (False, True)
+}
 
 
 def _render_pipeline_steps(has_raw: bool, has_doc: bool, has_decision: bool):
-    step1 = "done" if has_raw else "active" if not has_doc and not has_decision else ""
-    step2 = "done" if has_doc else "active" if has_raw and not has_doc else ""
-    step3 = "done" if has_decision else "active" if has_doc and not has_decision else ""
-    c1 = "done" if has_raw else ""
-    c2 = "done" if has_doc else ""
-    st.markdown(
-        f'<div class="pipeline-wrap">'
-        f'<span class="pipeline-step {step1}"><span class="step-num">1</span> Extract</span>'
-        f'<span class="pipeline-conn {c1}"></span>'
-        f'<span class="pipeline-step {step2}"><span class="step-num">2</span> Validate</span>'
-        f'<span class="pipeline-conn {c2}"></span>'
-        f'<span class="pipeline-step {step3}"><span class="step-num">3</span> Route</span>'
-        f'</div>',
-        unsafe_allow_html=True,
+    st.markdown(_PIPELINE_HTML[(has_raw, has_doc, has_decision)], unsafe_allow_html=True)
+
+
+# Claim-form layout: section title -> field labels (matches CLAIM_FIELD_SPEC labels).
+_FORM_SECTIONS = [
+    ("Policy Information", ["Policy Number", "Policyholder Name", "Effective Date Start", "Effective Date End"]),
+    ("Incident Information", ["Incident Date", "Incident Time", "Location", "Description"]),
+    ("Involved Parties", ["Claimant", "Third Parties", "Contact Phone", "Contact Email", "Contact Address"]),
+    ("Asset Details", ["Asset Type", "Asset ID", "Estimated Damage"]),
+    ("Other Mandatory Fields", ["Claim Type", "Attachments", "Initial Estimate"]),
+]
+
+
+@st.cache_data(show_spinner=False)
+def _kpi_html(doc_json: str, _doc: "FNOLDocument") -> str:
+    """Build the KPI-card row HTML, cached on the serialized document."""
+    # One dump, then plain dict lookups — no per-field pydantic attribute chains.
+    d = _doc.model_dump()
+    holder = _get_holder_name(d)
+    damage = _get_estimated_damage(d)
+    inc_date = (d.get("incident") or {}).get("date")
+    tokens = {
+        "policy_num": (d.get("policy") or {}).get("number") or "—",
+        "holder": holder[:24] + ("…" if len(holder) > 24 else ""),
+        "inc_date": str(inc_date) if inc_date else "—",
+        "damage": f"${damage:,.0f}" if damage is not None else "—",
+        "claim_type": (d.get("status") or {}).get("claim_type") or "—",
+    }
+    return _KPI_TPL.format_map(tokens)
+
+
+@st.cache_data(show_spinner=False)
+def _form_html(doc_json: str, _doc: "FNOLDocument") -> tuple:
+    """Build the full claim-form HTML plus the ordered missing-field labels.
+
+    Cached on the serialized document so no-op reruns (sidebar typing, tab
+    switches) reuse the rendered string instead of re-walking the model.
+    """
+    from src.output_format import get_missing_fields
+
+    missing_list = get_missing_fields(_doc)
+    missing_set = frozenset(missing_list)
+    doc_dict = _doc.model_dump()
+    html = "".join(
+        _render_form_section(doc_dict, title, labels, missing_set)
+        for title, labels in _FORM_SECTIONS
     )
+    return html, missing_list
 
 
-def _render_kpi_cards(doc: FNOLDocument):
-    policy_num = (doc.policy and doc.policy.number) or "—"
-    holder = _get_holder_name(doc)
-    inc_date = (doc.incident and doc.incident.date) and str(doc.incident.date) or "—"
-    damage = _get_estimated_damage(doc)
-    damage_str = f"${damage:,.0f}" if damage is not None else "—"
-    claim_type = (doc.status and doc.status.claim_type) or "—"
-    st.markdown(
-        '<div class="kpi-row">'
-        f'<div class="kpi-card"><div class="label">Policy #</div><div class="val">{policy_num}</div></div>'
-        f'<div class="kpi-card"><div class="label">Holder / Claimant</div><div class="val muted">{holder[:24]}{"…" if len(holder) > 24 else ""}</div></div>'
-        f'<div class="kpi-card"><div class="label">Incident date</div><div class="val">{inc_date}</div></div>'
-        f'<div class="kpi-card"><div class="label">Est. damage</div><div class="val">{damage_str}</div></div>'
-        f'<div class="kpi-card"><div class="label">Claim type</div><div class="val">{claim_type}</div></div>'
-        '</div>',
-        unsafe_allow_html=True,
-    )
+def _render_form_section(doc_dict: dict, section_title: str, field_labels: list, missing) -> str:
+    """Build the HTML for one claim-form section (no Streamlit calls)."""
+    from src.output_format import get_field_value_from_dict
+
+    rows = []
+    for label in field_labels:
+        val = get_field_value_from_dict(doc_dict, label)
+        val_class = "form-value missing" if label in missing else "form-value"
+        val_esc = _esc(str(val), quote=True)
+        rows.append(
+            f'<div class="form-row"><span class="form-label">{label}</span><span class="{val_class}">{val_esc}</span></div>'
+        )
+    return f'<div class="form-section"><h5>{section_title}</h5>{"".join(rows)}</div>'
 
 
 def _render_dashboard_header(last_file: Optional[str], decision: Any):
@@ -271,24 +272,143 @@ def _render_dashboard_header(last_file: Optional[str], decision: Any):
     if decision:
         route_label = decision.recommended_route.replace("_", " ").title()
         status_label = "Decision ready" if decision.is_decision_ready else "Manual review"
-    stats_html = ""
+    stats = []
     if last_file:
-        stats_html = f'<span class="dash-stat"><strong>File</strong> {last_file}</span>'
+        stats.append(_STAT_TPL.format_map({"label": "File", "value": last_file}))
     if decision:
-        stats_html += f'<span class="dash-stat"><strong>Route</strong> {route_label}</span>'
-        stats_html += f'<span class="dash-stat"><strong>Status</strong> {status_label}</span>'
+        stats.append(_STAT_TPL.format_map({"label": "Route", "value": route_label}))
+        stats.append(_STAT_TPL.format_map({"label": "Status", "value": status_label}))
     st.markdown(
-        '<div class="dash-header">'
-        '<div class="dash-title-block">'
-        '<h1>📋 Autonomous Insurance Claims Processing Agent</h1>'
-        '<p>First Notice of Loss (FNOL) — Extract, Validate, Route</p>'
-        '</div>'
-        f'<div class="dash-stats">{stats_html or "<span class=\"dash-stat\">Upload a file to start</span>"}</div>'
-        '</div>',
+        _HEADER_TPL.format_map({"stats": "".join(stats) or _HEADER_EMPTY_STATS}),
         unsafe_allow_html=True,
     )
 
 
+@st.fragment
+def _render_dashboard_body(fnol_doc, decision, raw_text, last_file, uploaded: bool):
+    """
+    Result area of the dashboard (KPIs, claim form, decision, tabs).
+    Runs as a Streamlit fragment: widget events inside it (tab switches,
+    downloads) re-run only this subtree, and sidebar typing in the
+    configuration inputs no longer rebuilds it at all.
+    """
+    # When we have no result yet, stop here (only upload + pipeline steps)
+    if fnol_doc is None and not decision:
+        if not uploaded and not last_file:
+            st.info("Upload a FNOL document to see extraction results and routing.")
+        return
+
+    # Serialize the document once; reused by the decision panel, the JSON tab,
+    # and as the cache key for the rendered HTML blocks.
+    doc_dump = fnol_doc.model_dump(mode="json") if fnol_doc else None
+    doc_json = fnol_doc.model_dump_json() if fnol_doc else None
+
+    # Render signature: when the session result is unchanged (e.g. the rerun was
+    # sidebar typing), blit the HTML stored last run instead of rebuilding it.
+    sig = hashlib.blake2b(
+        (raw_text or "").encode() + (doc_json or "").encode() + repr(decision).encode(),
+        digest_size=8,
+    ).digest()
+    if st.session_state.get(SK_RENDER_SIG) == sig:
+        kpi_html, form_html, missing_list = st.session_state[SK_RENDERED_HTML]
+    else:
+        kpi_html = _kpi_html(doc_json, fnol_doc) if fnol_doc else None
+        form_html, missing_list = _form_html(doc_json, fnol_doc) if fnol_doc else (None, [])
+        st.session_state[SK_RENDER_SIG] = sig
+        st.session_state[SK_RENDERED_HTML] = (kpi_html, form_html, missing_list)
+
+    # KPI summary cards (from last or current result)
+    st.markdown(_SUMMARY_TITLE, unsafe_allow_html=True)
+    if kpi_html:
+        st.markdown(kpi_html, unsafe_allow_html=True)
+    else:
+        st.caption("No structured data (enable LLM extraction and process a file).")
+
+    # Claim form — all extracted fields by section
+    if fnol_doc:
+        st.markdown(_FORM_TITLE, unsafe_allow_html=True)
+        # One markdown call for the whole form: 1 Streamlit delta instead of 5.
+        st.markdown(form_html, unsafe_allow_html=True)
+        if missing_list:
+            st.markdown("**Missing fields**")
+            missing_html = "".join(f'<span class="missing-badge">{m}</span>' for m in missing_list)
+            st.markdown(f'<div>{missing_html}</div>', unsafe_allow_html=True)
+
+    # Decision panel (main dashboard block)
+    st.markdown(_DECISION_TITLE, unsafe_allow_html=True)
+    if decision:
+        route_label = decision.recommended_route.replace("_", " ").title()
+        status_text, badge_class = _decision_ready_badge(decision.is_decision_ready)
+        route_class = _route_display_class(decision.recommended_route)
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown(
+                f'<div class="styled-card {route_class}" style="padding-left: 1rem;">'
+                f'<h4>Recommended route</h4><div class="value">{route_label}</div></div>',
+                unsafe_allow_html=True,
+            )
+        with c2:
+            st.markdown(
+                f'<div class="styled-card"><h4>Status</h4><div><span class="{badge_class}">{status_text}</span></div></div>',
+                unsafe_allow_html=True,
+            )
+        st.markdown("**Reasoning**")
+        items = "".join(f"<li>{_esc(r)}</li>" for r in decision.reasoning)
+        st.markdown(
+            f"<ul class='reasoning-list' style='list-style: disc; margin-left: 1.25rem;'>{items}</ul>",
+            unsafe_allow_html=True,
+        )
+        if decision.flags:
+            st.markdown("**Flags**")
+            st.code(", ".join(decision.flags), language=None)
+        if fnol_doc:
+            from src.output_format import DecisionOutput
+
+            standard = _standard_output(fnol_doc, decision)
+            full_output = DecisionOutput(
+                recommended_route=decision.recommended_route,
+                reasoning=decision.reasoning,
+                flags=decision.flags,
+                is_decision_ready=decision.is_decision_ready,
+                extracted_data=doc_dump,
+            )
+            cdl, cds = st.columns(2)
+            with cdl:
+                st.download_button(
+                    "Download standard output (JSON)",
+                    data=orjson.dumps(standard, default=str, option=orjson.OPT_INDENT_2).decode(),
+                    file_name="fnol_standard_output.json",
+                    mime="application/json",
+                    key="standard_dl",
+                )
+            with cds:
+                st.download_button(
+                    "Download full decision JSON",
+                    data=full_output.model_dump_json(indent=2),
+                    file_name="fnol_decision.json",
+                    mime="application/json",
+                    key="decision_dl",
+                )
+
+    # Tabs: Raw text | Structured JSON
+    st.markdown(_EXPORT_TITLE, unsafe_allow_html=True)
+    tab1, tab2 = st.tabs(["📄 Raw extraction", "📊 Structured JSON"])
+    with tab1:
+        st.text_area("Raw text", value=raw_text or "", height=300, disabled=True, label_visibility="collapsed")
+    with tab2:
+        if fnol_doc:
+            st.json(doc_dump)
+            st.download_button(
+                "Download extraction JSON",
+                data=fnol_doc.model_dump_json(indent=2),
+                file_name="fnol_extraction.json",
+                mime="application/json",
+                key="extraction_dl",
+            )
+        else:
+            st.info("Enable LLM extraction and process a file to see structured data.")
+
+
 def run_app():
     st.set_page_config(
         page_title="FNOL Claims Agent",
@@ -296,7 +416,7 @@ def run_app():
         layout="wide",
         initial_sidebar_state="expanded",
     )
-    _inject_css()
+    st.markdown(_load_css(), unsafe_allow_html=True)
 
     # Session state init
     if SK_LAST_FILE not in st.session_state:
@@ -311,10 +431,14 @@ def run_app():
         st.session_state[SK_ERROR] = None
     if SK_TRIGGER_SAMPLE not in st.session_state:
         st.session_state[SK_TRIGGER_SAMPLE] = False
+    if SK_RENDER_SIG not in st.session_state:
+        st.session_state[SK_RENDER_SIG] = None
+    if SK_RENDERED_HTML not in st.session_state:
+        st.session_state[SK_RENDERED_HTML] = None
 
     last_file = st.session_state[SK_LAST_FILE]
     raw_text = st.session_state[SK_RAW_TEXT]
-    fnol_doc: Optional[FNOLDocument] = st.session_state.get(SK_FNOL_DOC)
+    fnol_doc: Optional["FNOLDocument"] = st.session_state.get(SK_FNOL_DOC)
     decision = st.session_state.get(SK_DECISION)
     err_msg = st.session_state.get(SK_ERROR)
 
@@ -335,27 +459,23 @@ def run_app():
             st.caption(f"Last processed: **{last_file}**")
         if last_file or raw_text or fnol_doc or decision:
             if st.button("Clear session"):
-                for key in [SK_LAST_FILE, SK_RAW_TEXT, SK_FNOL_DOC, SK_DECISION, SK_ERROR]:
+                for key in [SK_LAST_FILE, SK_RAW_TEXT, SK_FNOL_DOC, SK_DECISION, SK_ERROR,
+                            SK_RENDER_SIG, SK_RENDERED_HTML]:
                     st.session_state[key] = None
                 st.rerun()
         else:
             st.caption("No claim processed yet.")
         st.markdown("---")
         st.subheader("Routing rules")
-        st.caption(
-            "• Damage < $25,000 → **Fast-track**\n"
-            "• Mandatory field missing → **Manual review**\n"
-            "• Words: fraud, inconsistent, staged → **Investigation**\n"
-            "• Claim type = injury → **Specialist queue**"
-        )
+        st.caption(_SIDEBAR_RULES)
         st.markdown("---")
-        st.caption("Upload a PDF or TXT FNOL, or load the sample claim.")
+        st.caption(_SIDEBAR_HINT)
 
     # Header with dynamic stats
     _render_dashboard_header(last_file, decision)
 
     # Upload zone (always visible) + Load sample
-    st.markdown('<p class="section-title">Upload document</p>', unsafe_allow_html=True)
+    st.markdown(_UPLOAD_TITLE, unsafe_allow_html=True)
     col_upload, col_sample = st.columns([3, 1])
     with col_upload:
         st.markdown('<div class="upload-zone">', unsafe_allow_html=True)
@@ -377,16 +497,22 @@ def run_app():
         sample_path = _project_root / "sample_fnol_full.txt"
         if sample_path.exists():
             with st.spinner("Running pipeline on sample claim…"):
-                raw_text, fnol_doc, err_msg = extract_fnol_from_file(
-                    sample_path,
-                    use_llm=use_llm,
-                    model=model,
-                    api_key=api_key or None,
-                )
+                file_hash = hashlib.sha256(sample_path.read_bytes()).hexdigest()
+                try:
+                    raw_text, fnol_doc, err_msg, decision = _run_pipeline(
+                        file_hash,
+                        sample_path,
+                        sample_path.name,
+                        use_llm,
+                        model,
+                        api_key or None,
+                    )
+                except _PipelineError as e:
+                    raw_text, fnol_doc, err_msg, decision = e.raw_text, None, str(e), None
             st.session_state[SK_ERROR] = err_msg
             st.session_state[SK_RAW_TEXT] = raw_text
             st.session_state[SK_FNOL_DOC] = fnol_doc
-            st.session_state[SK_DECISION] = route_fnol(fnol_doc) if fnol_doc else None
+            st.session_state[SK_DECISION] = decision
             st.session_state[SK_LAST_FILE] = "sample_fnol_full.txt" if not err_msg else last_file
             st.rerun()
         else:
@@ -394,26 +520,26 @@ def run_app():
 
     # If new file uploaded, run pipeline and update session
     if uploaded:
-        temp_dir = Path(_project_root) / "temp_uploads"
-        temp_dir.mkdir(exist_ok=True)
-        temp_path = temp_dir / uploaded.name
-        try:
-            temp_path.write_bytes(uploaded.getvalue())
-        except Exception as e:
-            st.session_state[SK_ERROR] = str(e)
-            st.rerun()
+        # Hash and extract straight from the upload buffer (zero-copy memoryview):
+        # no temp-file write/read round-trip, nothing accumulating on disk.
+        file_bytes = uploaded.getbuffer()
         with st.spinner("Running pipeline: Extract → Validate → Route…"):
-            raw_text, fnol_doc, err_msg = extract_fnol_from_file(
-                temp_path,
-                use_llm=use_llm,
-                model=model,
-                api_key=api_key or None,
-            )
-        # Uploaded file is kept in temp_uploads (not deleted)
+            file_hash = hashlib.sha256(file_bytes).hexdigest()
+            try:
+                raw_text, fnol_doc, err_msg, decision = _run_pipeline(
+                    file_hash,
+                    file_bytes,
+                    uploaded.name,
+                    use_llm,
+                    model,
+                    api_key or None,
+                )
+            except _PipelineError as e:
+                raw_text, fnol_doc, err_msg, decision = e.raw_text, None, str(e), None
         st.session_state[SK_ERROR] = err_msg
         st.session_state[SK_RAW_TEXT] = raw_text
         st.session_state[SK_FNOL_DOC] = fnol_doc
-        st.session_state[SK_DECISION] = route_fnol(fnol_doc) if fnol_doc else None
+        st.session_state[SK_DECISION] = decision
         if not err_msg:
             st.session_state[SK_LAST_FILE] = uploaded.name
         st.rerun()
@@ -431,119 +557,7 @@ def run_app():
     has_decision = decision is not None
     _render_pipeline_steps(has_raw, has_doc, has_decision)
 
-    # When we have no result yet, stop here (only upload + pipeline steps)
-    if not has_doc and not decision:
-        if not uploaded and not last_file:
-            st.info("Upload a FNOL document to see extraction results and routing.")
-        return
-
-    # KPI summary cards (from last or current result)
-    st.markdown('<p class="section-title">Claim summary</p>', unsafe_allow_html=True)
-    if fnol_doc:
-        _render_kpi_cards(fnol_doc)
-    else:
-        st.caption("No structured data (enable LLM extraction and process a file).")
-
-    # Claim form — all extracted fields by section
-    if fnol_doc:
-        st.markdown('<p class="section-title">Claim form (all fields)</p>', unsafe_allow_html=True)
-        missing_list = get_missing_fields(fnol_doc)
-        sections = [
-            ("Policy Information", ["Policy Number", "Policyholder Name", "Effective Date Start", "Effective Date End"]),
-            ("Incident Information", ["Incident Date", "Incident Time", "Location", "Description"]),
-            ("Involved Parties", ["Claimant", "Third Parties", "Contact Phone", "Contact Email", "Contact Address"]),
-            ("Asset Details", ["Asset Type", "Asset ID", "Estimated Damage"]),
-            ("Other Mandatory Fields", ["Claim Type", "Attachments", "Initial Estimate"]),
-        ]
-        for section_title, field_labels in sections:
-            rows_html = ""
-            for label in field_labels:
-                val = get_field_value_for_form(fnol_doc, label)
-                is_missing = label in missing_list
-                val_class = "form-value missing" if is_missing else "form-value"
-                val_esc = str(val).replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
-                rows_html += f'<div class="form-row"><span class="form-label">{label}</span><span class="{val_class}">{val_esc}</span></div>'
-            st.markdown(
-                f'<div class="form-section"><h5>{section_title}</h5>{rows_html}</div>',
-                unsafe_allow_html=True,
-            )
-        if missing_list:
-            st.markdown("**Missing fields**")
-            missing_html = "".join(f'<span class="missing-badge">{m}</span>' for m in missing_list)
-            st.markdown(f'<div>{missing_html}</div>', unsafe_allow_html=True)
-
-    # Decision panel (main dashboard block)
-    st.markdown('<p class="section-title">Routing decision</p>', unsafe_allow_html=True)
-    if decision:
-        route_label = decision.recommended_route.replace("_", " ").title()
-        status_text, badge_class = _decision_ready_badge(decision.is_decision_ready)
-        route_class = _route_display_class(decision.recommended_route)
-        c1, c2 = st.columns(2)
-        with c1:
-            st.markdown(
-                f'<div class="styled-card {route_class}" style="padding-left: 1rem;">'
-                f'<h4>Recommended route</h4><div class="value">{route_label}</div></div>',
-                unsafe_allow_html=True,
-            )
-        with c2:
-            st.markdown(
-                f'<div class="styled-card"><h4>Status</h4><div><span class="{badge_class}">{status_text}</span></div></div>',
-                unsafe_allow_html=True,
-            )
-        st.markdown("**Reasoning**")
-        reasoning_html = "<ul class='reasoning-list' style='list-style: disc; margin-left: 1.25rem;'>"
-        for r in decision.reasoning:
-            reasoning_html += f"<li>{r}</li>"
-        reasoning_html += "</ul>"
-        st.markdown(reasoning_html, unsafe_allow_html=True)
-        if decision.flags:
-            st.markdown("**Flags**")
-            st.code(", ".join(decision.flags), language=None)
-        if fnol_doc:
-            standard = build_standard_output(fnol_doc, decision)
-            full_output = {
-                "recommended_route": decision.recommended_route,
-                "reasoning": decision.reasoning,
-                "flags": decision.flags,
-                "is_decision_ready": decision.is_decision_ready,
-                "extracted_data": fnol_doc.model_dump(mode="json"),
-            }
-            cdl, cds = st.columns(2)
-            with cdl:
-                st.download_button(
-                    "Download standard output (JSON)",
-                    data=json.dumps(standard, indent=2, default=str),
-                    file_name="fnol_standard_output.json",
-                    mime="application/json",
-                    key="standard_dl",
-                )
-            with cds:
-                st.download_button(
-                    "Download full decision JSON",
-                    data=json.dumps(full_output, indent=2, default=str),
-                    file_name="fnol_decision.json",
-                    mime="application/json",
-                    key="decision_dl",
-                )
-
-    # Tabs: Raw text | Structured JSON
-    st.markdown('<p class="section-title">Data & export</p>', unsafe_allow_html=True)
-    tab1, tab2 = st.tabs(["📄 Raw extraction", "📊 Structured JSON"])
-    with tab1:
-        st.text_area("Raw text", value=raw_text or "", height=300, disabled=True, label_visibility="collapsed")
-    with tab2:
-        if fnol_doc:
-            data = fnol_doc.model_dump(mode="json")
-            st.json(data)
-            st.download_button(
-                "Download extraction JSON",
-                data=json.dumps(data, indent=2, default=str),
-                file_name="fnol_extraction.json",
-                mime="application/json",
-                key="extraction_dl",
-            )
-        else:
-            st.info("Enable LLM extraction and process a file to see structured data.")
+    _render_dashboard_body(fnol_doc, decision, raw_text, last_file, uploaded is not None)
 
 
 if __name__ == "__main__":
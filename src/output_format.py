@@ -3,12 +3,28 @@ Output format and missing-fields logic for FNOL.
 Builds extractedFields, missingFields, recommendedRoute, reasoning per spec.
 """
 
-from typing import Any, List
+from typing import Any, List, Optional
+
+from pydantic import BaseModel
 
 from .schema import FNOLDocument
 from .router import RoutingDecision, route_fnol
 
 
+class DecisionOutput(BaseModel):
+    """Full decision payload (route + reasoning + extracted data) for export.
+
+    Serialized with model_dump_json so downloads go through pydantic-core's
+    single-pass serializer instead of json.dumps with a default= fallback.
+    """
+
+    recommended_route: str
+    reasoning: List[str]
+    flags: List[str]
+    is_decision_ready: bool
+    extracted_data: Optional[dict] = None
+
+
 # All extractable fields (label -> path to value). Used for form display and missingFields.
 CLAIM_FIELD_SPEC = [
     # Policy Information
@@ -42,6 +58,10 @@ CLAIM_FIELD_SPEC = [
 ]
 
 
+# O(1) label -> getter dispatch, built once from CLAIM_FIELD_SPEC.
+_FIELD_GETTERS = dict(CLAIM_FIELD_SPEC)
+
+
 def _is_empty(val: Any) -> bool:
     if val is None:
         return True
@@ -52,43 +72,73 @@ def _is_empty(val: Any) -> bool:
     return False
 
 
-def get_missing_fields(doc: FNOLDocument) -> List[str]:
-    """Return list of field labels that are missing (empty) in the document."""
+def _missing_from_dump(d: dict) -> List[str]:
+    """Scan a model_dump() dict against FIELD_PATHS and return empty labels.
+
+    Emptiness is checked inline (None / "" / [] plus the whitespace-only
+    string case) rather than through _is_empty, skipping the function call
+    and isinstance dispatch per value in this hot loop.
+    """
     missing: List[str] = []
-    for label, getter in CLAIM_FIELD_SPEC:
-        try:
-            val = getter(doc)
-            if _is_empty(val):
-                missing.append(label)
-        except Exception:
+    for label, paths in FIELD_PATHS.items():
+        val = None
+        for path in paths:
+            val = _get_path(d, path)
+            if not (val is None or val == "" or val == []
+                    or (isinstance(val, str) and val.isspace())):
+                break
+        if label == "Third Parties" and isinstance(val, list):
+            val = [p for p in val if isinstance(p, dict) and p.get("name")]
+        if val is None or val == "" or val == [] or (isinstance(val, str) and val.isspace()):
             missing.append(label)
     return missing
 
 
-def get_extracted_fields_flat(doc: FNOLDocument) -> dict:
-    """Return a flat dict of field label -> display value for extracted fields only (non-empty)."""
+def get_missing_fields(doc: FNOLDocument) -> List[str]:
+    """
+    Return list of field labels that are missing (empty) in the document.
+    Dumps the model once and scans the flat FIELD_PATHS table, instead of
+    invoking the per-label getter lambdas (and their pydantic attribute
+    chains) on the hot rerun path.
+    """
+    return _missing_from_dump(doc.model_dump(mode="python"))
+
+
+def _flat_from_dump(d: dict) -> dict:
+    """Build the flat label -> display value dict from a model_dump() dict."""
     out = {}
-    for label, getter in CLAIM_FIELD_SPEC:
-        try:
-            val = getter(doc)
-            if val is None:
-                out[label] = None
-            elif isinstance(val, list):
-                out[label] = val if val else None
-            else:
-                out[label] = str(val) if val else None
-        except Exception:
+    for label, paths in FIELD_PATHS.items():
+        val = None
+        for path in paths:
+            val = _get_path(d, path)
+            if not _is_empty(val):
+                break
+        if label == "Third Parties" and isinstance(val, list):
+            val = [p.get("name") for p in val if isinstance(p, dict) and p.get("name")]
+        if val is None:
             out[label] = None
+        elif isinstance(val, list):
+            out[label] = val if val else None
+        else:
+            out[label] = str(val) if val else None
     return out
 
 
+def get_extracted_fields_flat(doc: FNOLDocument) -> dict:
+    """Return a flat dict of field label -> display value for extracted fields only (non-empty)."""
+    return _flat_from_dump(doc.model_dump(mode="python"))
+
+
 def build_standard_output(doc: FNOLDocument, decision: RoutingDecision) -> dict:
     """
     Build the standard output JSON:
     { "extractedFields": {}, "missingFields": [], "recommendedRoute": "", "reasoning": "" }
+
+    The document is dumped exactly once; the same dict feeds both the
+    extractedFields payload and the missing-fields scan.
     """
     extracted = doc.model_dump(mode="json")
-    missing = get_missing_fields(doc)
+    missing = _missing_from_dump(extracted)
     reasoning_str = " | ".join(decision.reasoning) if decision.reasoning else ""
     return {
         "extractedFields": extracted,
@@ -98,17 +148,74 @@ def build_standard_output(doc: FNOLDocument, decision: RoutingDecision) -> dict:
     }
 
 
+# Dotted-path spec: label -> alternative paths into a model_dump() dict.
+# Mirrors CLAIM_FIELD_SPEC but reads plain dicts, avoiding repeated pydantic
+# attribute access when many fields are fetched from the same document.
+FIELD_PATHS = {
+    "Policy Number": (("policy", "number"),),
+    "Policyholder Name": (("policy", "holder_name"),),
+    "Effective Date Start": (("policy", "effective_date_start"),),
+    "Effective Date End": (("policy", "effective_date_end"),),
+    "Incident Date": (("incident", "date"),),
+    "Incident Time": (("incident", "time"),),
+    "Location": (("incident", "location"),),
+    "Description": (("incident", "description"),),
+    "Claimant": (("parties", "claimant", "name"),),
+    "Third Parties": (("parties", "third_parties"),),
+    "Contact Phone": (("parties", "contact_details", "phone"), ("parties", "claimant", "contact", "phone")),
+    "Contact Email": (("parties", "contact_details", "email"), ("parties", "claimant", "contact", "email")),
+    "Contact Address": (("parties", "contact_details", "address"), ("parties", "claimant", "contact", "address")),
+    "Asset Type": (("asset", "type"),),
+    "Asset ID": (("asset", "id"),),
+    "Estimated Damage": (("asset", "estimated_damage"), ("status", "initial_estimate")),
+    "Claim Type": (("status", "claim_type"),),
+    "Attachments": (("status", "attachments"),),
+    "Initial Estimate": (("status", "initial_estimate"),),
+}
+
+
+def _get_path(d: Any, path: tuple) -> Any:
+    """Follow a key path through nested dicts; None as soon as a level is absent."""
+    for key in path:
+        if not isinstance(d, dict):
+            return None
+        d = d.get(key)
+    return d
+
+
+def get_field_value_from_dict(doc_dict: dict, label: str) -> Any:
+    """
+    Like get_field_value_for_form, but reads a pre-dumped model_dump() dict.
+    Callers rendering many fields should dump the document once and use this.
+    """
+    paths = FIELD_PATHS.get(label)
+    if not paths:
+        return "—"
+    val = None
+    for path in paths:
+        val = _get_path(doc_dict, path)
+        if not _is_empty(val):
+            break
+    if label == "Third Parties" and isinstance(val, list):
+        val = [p.get("name") for p in val if isinstance(p, dict) and p.get("name")]
+    if _is_empty(val):
+        return "—"
+    if isinstance(val, list):
+        return ", ".join(str(x) for x in val)
+    return str(val)
+
+
 def get_field_value_for_form(doc: FNOLDocument, label: str) -> Any:
     """Get display value for one field by label (for claim form UI)."""
-    for lbl, getter in CLAIM_FIELD_SPEC:
-        if lbl == label:
-            try:
-                val = getter(doc)
-                if val is None:
-                    return "—"
-                if isinstance(val, list):
-                    return ", ".join(str(x) for x in val) if val else "—"
-                return str(val) if val is not None else "—"
-            except Exception:
-                return "—"
-    return "—"
+    getter = _FIELD_GETTERS.get(label)
+    if getter is None:
+        return "—"
+    try:
+        val = getter(doc)
+        if val is None:
+            return "—"
+        if isinstance(val, list):
+            return ", ".join(str(x) for x in val) if val else "—"
+        return str(val) if val is not None else "—"
+    except Exception:
+        return "—"
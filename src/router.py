@@ -3,6 +3,7 @@ Routing logic for FNOL claims.
 Evaluates extracted data against mandatory rules and returns recommended route + reasoning.
 """
 
+import re
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
@@ -11,6 +12,14 @@ from .schema import FNOLDocument
 # Keywords that trigger investigation flag (case-insensitive)
 INVESTIGATION_KEYWORDS = ("fraud", "inconsistent", "staged")
 
+# Single compiled alternation over the keywords; one C-level scan of the
+# description instead of one substring pass per keyword. Deliberately no
+# word boundaries so e.g. "fraudulent" keeps matching "fraud".
+_INVESTIGATION_RE = re.compile(
+    "|".join(map(re.escape, INVESTIGATION_KEYWORDS)),
+    re.IGNORECASE,
+)
+
 # Threshold for fast-track (currency-agnostic numeric comparison)
 FAST_TRACK_DAMAGE_THRESHOLD = 25_000.0
 
@@ -25,54 +34,51 @@ class RoutingDecision:
     is_decision_ready: bool  # True if no blocking issues for auto-routing
 
 
-def _has_mandatory_fields(doc: FNOLDocument) -> Tuple[bool, List[str]]:
+def _has_mandatory_fields(d: dict) -> Tuple[bool, List[str]]:
     """
     Check mandatory fields: Policy #, (Holder) Name, Incident Date.
-    Returns (all_present, list of missing field descriptions).
+    Takes a model_dump() dict; returns (all_present, missing field descriptions).
     """
     missing: List[str] = []
-    if not doc.policy or not (doc.policy.number and str(doc.policy.number).strip()):
+    policy = d.get("policy") or {}
+    number = policy.get("number")
+    if not (number and str(number).strip()):
         missing.append("Policy number")
-    name = None
-    if doc.parties and doc.parties.claimant and doc.parties.claimant.name:
-        name = doc.parties.claimant.name
-    if not name and doc.policy and doc.policy.holder_name:
-        name = doc.policy.holder_name
+    claimant = (d.get("parties") or {}).get("claimant") or {}
+    name = claimant.get("name") or policy.get("holder_name")
     if not name or not str(name).strip():
         missing.append("Policy holder / claimant name")
-    incident_date = None
-    if doc.incident and doc.incident.date:
-        incident_date = doc.incident.date
-    if not incident_date:
+    incident = d.get("incident") or {}
+    if not incident.get("date"):
         missing.append("Incident date")
     return (len(missing) == 0, missing)
 
 
-def _get_estimated_damage(doc: FNOLDocument) -> Optional[float]:
+def _get_estimated_damage(d: dict) -> Optional[float]:
     """Return estimated damage amount from asset or status."""
-    if doc.asset and doc.asset.estimated_damage is not None:
-        return float(doc.asset.estimated_damage)
-    if doc.status and doc.status.initial_estimate is not None:
-        return float(doc.status.initial_estimate)
+    damage = (d.get("asset") or {}).get("estimated_damage")
+    if damage is not None:
+        return float(damage)
+    estimate = (d.get("status") or {}).get("initial_estimate")
+    if estimate is not None:
+        return float(estimate)
     return None
 
 
-def _description_contains_keywords(doc: FNOLDocument) -> bool:
+def _description_contains_keywords(d: dict) -> bool:
     """True if incident description contains any of INVESTIGATION_KEYWORDS."""
-    desc = None
-    if doc.incident and doc.incident.description:
-        desc = doc.incident.description
+    desc = (d.get("incident") or {}).get("description")
     if not desc:
         return False
-    lower = desc.lower()
-    return any(kw in lower for kw in INVESTIGATION_KEYWORDS)
+    return bool(_INVESTIGATION_RE.search(desc))
 
 
-def _is_injury_claim(doc: FNOLDocument) -> bool:
+def _is_injury_claim(d: dict) -> bool:
     """True if claim type is injury (case-insensitive)."""
-    if not doc.status or not doc.status.claim_type:
+    claim_type = (d.get("status") or {}).get("claim_type")
+    if not claim_type:
         return False
-    return doc.status.claim_type.strip().lower() == "injury"
+    return claim_type.strip().lower() == "injury"
 
 
 def route_fnol(doc: FNOLDocument) -> RoutingDecision:
@@ -80,68 +86,61 @@ def route_fnol(doc: FNOLDocument) -> RoutingDecision:
     Evaluate the extracted FNOL document against the 4 mandatory routing rules.
     Returns a single recommended route with reasoning and flags.
     Priority order: Manual Review (missing mandatory) > Investigation > Specialist > Fast-track.
+
+    The document is dumped once and the rule conditions read the resulting
+    dict; reasoning text is built lazily for the matched route only.
     """
-    reasoning: List[str] = []
-    flags: List[str] = []
-
-    # 1) Mandatory fields -> Manual Review
-    has_mandatory, missing = _has_mandatory_fields(doc)
-    if not has_mandatory:
-        flags.append("missing_mandatory_fields")
-        reasoning.append(f"Mandatory fields missing: {', '.join(missing)}. Requires manual review.")
-        return RoutingDecision(
-            recommended_route="manual_review",
-            reasoning=reasoning,
-            flags=flags,
-            is_decision_ready=False,
-        )
-
-    # 2) Investigation keywords in description
-    if _description_contains_keywords(doc):
-        flags.append("investigation_keywords")
-        reasoning.append(
-            "Incident description contains one or more of: 'fraud', 'inconsistent', 'staged'. Flagged for investigation."
-        )
-        return RoutingDecision(
-            recommended_route="investigation",
-            reasoning=reasoning,
-            flags=flags,
-            is_decision_ready=False,
-        )
-
-    # 3) Injury claim -> Specialist Queue
-    if _is_injury_claim(doc):
-        flags.append("injury_claim")
-        reasoning.append("Claim type is 'injury'. Route to specialist queue.")
-        return RoutingDecision(
-            recommended_route="specialist",
-            reasoning=reasoning,
-            flags=flags,
-            is_decision_ready=True,
-        )
-
-    # 4) Estimated damage < 25,000 -> Fast-track
-    damage = _get_estimated_damage(doc)
-    if damage is not None and damage < FAST_TRACK_DAMAGE_THRESHOLD:
-        reasoning.append(
-            f"Estimated damage ({damage}) is below {FAST_TRACK_DAMAGE_THRESHOLD}. Fast-track eligible."
-        )
-        return RoutingDecision(
-            recommended_route="fast_track",
-            reasoning=reasoning,
-            flags=flags,
-            is_decision_ready=True,
-        )
+    d = doc.model_dump(mode="python")
+    has_mandatory, missing = _has_mandatory_fields(d)
+    damage = _get_estimated_damage(d)
+
+    # (condition, route, flag, is_decision_ready, lazy reasoning) in priority order.
+    rules = (
+        (
+            not has_mandatory,
+            "manual_review",
+            "missing_mandatory_fields",
+            False,
+            lambda: f"Mandatory fields missing: {', '.join(missing)}. Requires manual review.",
+        ),
+        (
+            _description_contains_keywords(d),
+            "investigation",
+            "investigation_keywords",
+            False,
+            lambda: "Incident description contains one or more of: 'fraud', 'inconsistent', 'staged'. Flagged for investigation.",
+        ),
+        (
+            _is_injury_claim(d),
+            "specialist",
+            "injury_claim",
+            True,
+            lambda: "Claim type is 'injury'. Route to specialist queue.",
+        ),
+        (
+            damage is not None and damage < FAST_TRACK_DAMAGE_THRESHOLD,
+            "fast_track",
+            None,
+            True,
+            lambda: f"Estimated damage ({damage}) is below {FAST_TRACK_DAMAGE_THRESHOLD}. Fast-track eligible.",
+        ),
+    )
+    for matched, route, flag, ready, reason in rules:
+        if matched:
+            return RoutingDecision(
+                recommended_route=route,
+                reasoning=[reason()],
+                flags=[flag] if flag else [],
+                is_decision_ready=ready,
+            )
 
     # Default: standard queue (no fast-track, no specialist, no investigation)
-    reasoning.append(
-        "No special routing conditions met. Standard processing queue."
-    )
+    reasoning = ["No special routing conditions met. Standard processing queue."]
     if damage is not None:
         reasoning.append(f"Estimated damage: {damage} (not below fast-track threshold).")
     return RoutingDecision(
         recommended_route="standard",
         reasoning=reasoning,
-        flags=flags,
+        flags=[],
         is_decision_ready=True,
     )
@@ -6,11 +6,59 @@ Used for extraction validation and routing decisions.
 from datetime import date, datetime
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+try:
+    import ciso8601
+    HAS_CISO8601 = True
+except ImportError:
+    HAS_CISO8601 = False
+
+try:
+    from dateutil import parser as _dateutil_parser
+    HAS_DATEUTIL = True
+except ImportError:
+    HAS_DATEUTIL = False
 
 # Type alias to avoid shadowing the field name "date" in Incident (Pydantic schema error)
 DateType = date
 
+# strptime fallback formats, built once instead of per _parse_date call.
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%B %d, %Y", "%d %B %Y")
+
+
+def _parse_date(value: str | None):
+    """Parse date string to YYYY-MM-DD for Pydantic date fields."""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    # Fast path: C-level ISO parse, then one dateutil call for everything
+    # else, instead of exception-driven retries over strptime formats.
+    if HAS_CISO8601:
+        try:
+            return ciso8601.parse_datetime(value).date()
+        except ValueError:
+            pass
+    if HAS_DATEUTIL:
+        try:
+            # dayfirst matches the strptime fallback's %d/%m/%Y-before-%m/%d/%Y
+            # ordering, so ambiguous dates like 05/06/2024 keep parsing day-first.
+            return _dateutil_parser.parse(value, fuzzy=False, dayfirst=True).date()
+        except (ValueError, OverflowError):
+            pass
+    for fmt in _DATE_FORMATS:
+        try:
+            s = value[:10] if len(value) > 10 else value
+            return datetime.strptime(s, fmt).date()
+        except (ValueError, TypeError):
+            continue
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).date()
+    except (ValueError, TypeError):
+        return None
+
 
 # --- Policy ---
 class Policy(BaseModel):
@@ -21,6 +69,12 @@ class Policy(BaseModel):
     effective_date_start: Optional[date] = Field(None, description="Policy effective start date")
     effective_date_end: Optional[date] = Field(None, description="Policy effective end date")
 
+    @field_validator("effective_date_start", "effective_date_end", mode="before")
+    @classmethod
+    def _coerce_date(cls, v):
+        # LLM output uses assorted date formats; coerce inline during validation.
+        return _parse_date(v) if isinstance(v, str) else v
+
 
 # --- Incident ---
 class Incident(BaseModel):
@@ -31,6 +85,11 @@ class Incident(BaseModel):
     location: Optional[str] = Field(None, description="Incident location/address")
     description: Optional[str] = Field(None, description="Incident description")
 
+    @field_validator("date", mode="before")
+    @classmethod
+    def _coerce_date(cls, v):
+        return _parse_date(v) if isinstance(v, str) else v
+
 
 # --- Parties ---
 class ContactDetails(BaseModel):